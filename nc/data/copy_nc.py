@@ -12,17 +12,46 @@ CLEAN_DATABASE = """
 """  # noqa
 
 # NC_COPY_INSTRUCTIONS:
-# KEY: Filename that will be found on the file system.
+# KEY: Tab-delimited data file that will be found on the file system.
 # VALUE: The SQL COPY statement.
-# The SQL COPY statement is used with psycopg3's copy method which requires the FROM statement to be STDIN
+# The SQL COPY statement is used with psycopg3's copy method which requires the FROM statement to be STDIN.
+# Rows are converted to CSV (with a headings row) while being streamed to COPY.
 NC_COPY_INSTRUCTIONS = {
-    "Stop.csv": "COPY nc_stop (stop_id, agency_description, date, purpose, action, driver_arrest, passenger_arrest, encounter_force, engage_force, officer_injury, driver_injury, passenger_injury, officer_id, stop_location, stop_city) FROM STDIN WITH  DELIMITER ',' NULL AS '' CSV HEADER FORCE NOT NULL officer_id, stop_city, stop_location",
-    "PERSON.csv": "COPY nc_person (person_id, stop_id, type, age, gender, ethnicity, race) FROM STDIN WITH DELIMITER ',' NULL AS '' CSV HEADER FORCE NOT NULL ethnicity, gender, race",
-    "Search.csv": "COPY nc_search (search_id, stop_id, person_id, type, vehicle_search, driver_search, passenger_search, property_search, vehicle_siezed, personal_property_siezed, other_property_sized) FROM STDIN WITH DELIMITER ',' NULL AS '' CSV HEADER",
-    "Contraband.csv": "COPY nc_contraband (contraband_id, search_id, person_id, stop_id, ounces, pounds, pints, gallons, dosages, grams, kilos, money, weapons, dollar_amount) FROM STDIN WITH DELIMITER ',' CSV HEADER",
-    "SearchBasis.csv": "COPY nc_searchbasis (search_basis_id, search_id, person_id, stop_id, basis) FROM STDIN WITH DELIMITER ',' CSV HEADER",
+    "Stop.txt": "COPY nc_stop (stop_id, agency_description, date, purpose, action, driver_arrest, passenger_arrest, encounter_force, engage_force, officer_injury, driver_injury, passenger_injury, officer_id, stop_location, stop_city) FROM STDIN WITH  DELIMITER ',' NULL AS '' CSV HEADER FORCE NOT NULL officer_id, stop_city, stop_location",
+    "PERSON.txt": "COPY nc_person (person_id, stop_id, type, age, gender, ethnicity, race) FROM STDIN WITH DELIMITER ',' NULL AS '' CSV HEADER FORCE NOT NULL ethnicity, gender, race",
+    "Search.txt": "COPY nc_search (search_id, stop_id, person_id, type, vehicle_search, driver_search, passenger_search, property_search, vehicle_siezed, personal_property_siezed, other_property_sized) FROM STDIN WITH DELIMITER ',' NULL AS '' CSV HEADER",
+    "Contraband.txt": "COPY nc_contraband (contraband_id, search_id, person_id, stop_id, ounces, pounds, pints, gallons, dosages, grams, kilos, money, weapons, dollar_amount) FROM STDIN WITH DELIMITER ',' CSV HEADER",
+    "SearchBasis.txt": "COPY nc_searchbasis (search_basis_id, search_id, person_id, stop_id, basis) FROM STDIN WITH DELIMITER ',' CSV HEADER",
 }  # noqa
 
+# Table loaded by each NC_COPY_INSTRUCTIONS entry
+NC_COPY_TABLES = {
+    "Stop.txt": "nc_stop",
+    "PERSON.txt": "nc_person",
+    "Search.txt": "nc_search",
+    "Contraband.txt": "nc_contraband",
+    "SearchBasis.txt": "nc_searchbasis",
+}
+
+# Parallel loads COPY each data file into a table of the same name in this
+# schema (by setting the search_path) before publishing them all at once.
+STAGING_SCHEMA = "nc_import"
+
+CREATE_STAGING_SCHEMA = f"""
+    DROP SCHEMA IF EXISTS "{STAGING_SCHEMA}" CASCADE;
+    CREATE SCHEMA "{STAGING_SCHEMA}";
+"""
+
+CREATE_STAGING_TABLE = (
+    'CREATE TABLE "%s"."{table}" (LIKE "public"."{table}" INCLUDING DEFAULTS)' % STAGING_SCHEMA
+)
+
+PUBLISH_STAGING_TABLE = (
+    'INSERT INTO "public"."{table}" SELECT * FROM "%s"."{table}"' % STAGING_SCHEMA
+)
+
+DROP_STAGING_SCHEMA = f'DROP SCHEMA IF EXISTS "{STAGING_SCHEMA}" CASCADE'
+
 NC_AGENCY_COPY_INSTRUCTIONS = "COPY nc_agency (id, name, census_profile_id) FROM STDIN WITH DELIMITER ',' CSV HEADER FORCE NOT NULL census_profile_id"
 
 FINALIZE_COPY = """
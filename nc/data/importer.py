@@ -1,10 +1,12 @@
 import csv
 import glob
+import io
 import logging
 import os
 import re
 import sys
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 from django.conf import settings
@@ -15,7 +17,7 @@ from nc.data import copy_nc
 from nc.models import Agency, ContrabandSummary, Search, Stop, StopSummary
 from tsdata.dataset_facts import compute_dataset_facts
 from tsdata.sql import drop_constraints_and_indexes
-from tsdata.utils import call, download_and_unzip_data, line_count, unzip_data
+from tsdata.utils import download_and_unzip_data, unzip_data
 
 from .download_from_nc import nc_download_and_unzip_data
 
@@ -23,10 +25,42 @@ logger = logging.getLogger(__name__)
 
 MAGIC_NC_FTP_URL = "ftp://nc.us/"
 
-
-def run(url, destination=None, zip_path=None, min_stop_id=None, max_stop_id=None, prime_cache=True):
+# Flush converted rows to COPY once this many characters are buffered
+COPY_BUFFER_SIZE = 1024 * 1024
+
+csv.register_dialect(
+    "nc_data_in",
+    delimiter="\t",
+    doublequote=False,
+    escapechar=None,
+    lineterminator="\r\n",
+    quotechar='"',
+    quoting=csv.QUOTE_MINIMAL,
+    skipinitialspace=False,
+)
+csv.register_dialect(
+    "nc_data_out",
+    delimiter=",",
+    doublequote=False,
+    escapechar=None,
+    lineterminator="\n",
+    quotechar='"',
+    quoting=csv.QUOTE_MINIMAL,
+    skipinitialspace=False,
+)
+
+
+def run(
+    url,
+    destination=None,
+    zip_path=None,
+    min_stop_id=None,
+    max_stop_id=None,
+    prime_cache=True,
+    parallel=False,
+):
     """
-    Download NC data, extract, convert to CSV, and load into PostgreSQL
+    Download NC data, extract, and stream it into PostgreSQL
 
     :param url: if not None, zip will be downloaded from this URL; this can
       either be a URL supported by the requests library OR the special URL
@@ -41,6 +75,8 @@ def run(url, destination=None, zip_path=None, min_stop_id=None, max_stop_id=None
       save time for developers by reducing the amount of data to import
     :param min_stop_id: only process stops with ids >= this value; this is to
       save time for developers by reducing the amount of data to import
+    :param parallel: COPY the data files concurrently, each on its own
+      connection, into staging tables before publishing them together
     """
     if not url and not destination:
         raise ValueError("destination must be provided when no URL is provided")
@@ -69,18 +105,14 @@ def run(url, destination=None, zip_path=None, min_stop_id=None, max_stop_id=None
         # 2000-2001 since so few agencies reported then.
         override_start_date = "Jan 01, 2002"
 
-    # convert data files to CSV for database importing
-    logger.info("Converting to CSV")
-    convert_to_csv(destination)
-
     # find any new NC agencies and add to a copy of NC_agencies.csv
-    logger.info("Looking for new NC agencies in Stops.csv")
+    logger.info("Looking for new NC agencies in Stop.txt")
     nc_agency_csv = update_nc_agencies(
         os.path.join(os.path.dirname(__file__), "NC_agencies.csv"), destination
     )
 
-    # use COPY to load CSV files as quickly as possible
-    copy_from(destination, nc_agency_csv)
+    # use COPY to stream the data files into the database as quickly as possible
+    copy_from(destination, nc_agency_csv, parallel=parallel)
     logger.info("NC Data Import Complete")
 
     # fix landing page data
@@ -138,43 +170,34 @@ def truncate_input_data(destination, min_stop_id, max_stop_id):
         os.replace(data_out_path, data_in_path)
 
 
+def standard_rows(data_file):
+    """
+    Yield the rows of an NC tab-delimited data file, cleaned up for loading:
+    NUL bytes (only seen in Stop.txt) are removed, columns are stripped of
+    surrounding whitespace, and columns beyond those in the first record are
+    dropped.  A row of "columnN" headings is yielded first.
+    """
+    reader = csv.reader((line.replace("\x00", "") for line in data_file), dialect="nc_data_in")
+    num_columns = sys.maxsize  # keep all of first row, however many
+    num_rows = 0
+    for row in reader:
+        columns = [column.strip() for column in row[:num_columns]]
+        if not num_rows:
+            # Some records in Stop.txt have extra columns; drop any
+            # columns beyond those in the first record.
+            num_columns = len(columns)
+            yield ["column%d" % (i + 1) for i in range(num_columns)]
+        num_rows += 1
+        yield columns
+    if reader.line_num != num_rows:
+        logger.error(f"{data_file.name}: read {reader.line_num} lines but {num_rows} rows")
+
+
 def to_standard_csv(input_path, output_path):
-    csv.register_dialect(
-        "nc_data_in",
-        delimiter="\t",
-        doublequote=False,
-        escapechar=None,
-        lineterminator="\r\n",
-        quotechar='"',
-        quoting=csv.QUOTE_MINIMAL,
-        skipinitialspace=False,
-    )
-    csv.register_dialect(
-        "nc_data_out",
-        delimiter=",",
-        doublequote=False,
-        escapechar=None,
-        lineterminator="\n",
-        quotechar='"',
-        quoting=csv.QUOTE_MINIMAL,
-        skipinitialspace=False,
-    )
     with open(input_path) as input:
         with open(output_path, "w") as output:
-            reader = csv.reader(input, dialect="nc_data_in")
             writer = csv.writer(output, dialect="nc_data_out")
-            headings_written = False
-            num_columns = sys.maxsize  # keep all of first row, however many
-            for row in reader:
-                columns = [column.strip() for i, column in enumerate(row) if i < num_columns]
-                if not headings_written:
-                    # Some records in Stops.csv have extra columns; drop any
-                    # columns beyond those in the first record.
-                    num_columns = len(columns)
-                    headings = ["column%d" % (i + 1) for i in range(len(columns))]
-                    writer.writerow(headings)
-                    headings_written = True
-                writer.writerow(columns)
+            writer.writerows(standard_rows(input))
 
 
 def convert_to_csv(destination):
@@ -189,17 +212,29 @@ def convert_to_csv(destination):
             logger.info(f"{csv_path} already exists, skipping csv conversion")
             continue
         logger.info(f"Converting {data_path} > {csv_path}")
-        # Edit source data .txt file in-place to remove NUL bytes
-        # (only seen in Stop.txt)
-        call([rf"sed -i 's/\x0//g' {data_path}"], shell=True)
         to_standard_csv(data_path, csv_path)
-        data_count = line_count(data_path)
-        csv_count = line_count(csv_path)
-        if data_count == (csv_count - 1):
-            logger.debug(f"CSV line count matches original data file: {data_count}")
-        else:
-            logger.error(f"DAT {data_count}")
-            logger.error(f"CSV {csv_count}")
+
+
+def copy_data_file(cur, data_path, copy_sql):
+    """
+    Stream an NC tab-delimited data file into COPY, converting each row to
+    CSV in memory instead of writing an intermediate CSV file.
+
+    :return: number of data rows copied
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, dialect="nc_data_out")
+    num_rows = -1  # don't count the headings row
+    with open(data_path) as data_file, cur.copy(copy_sql) as copy:
+        for row in standard_rows(data_file):
+            writer.writerow(row)
+            num_rows += 1
+            if buffer.tell() >= COPY_BUFFER_SIZE:
+                copy.write(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate()
+        copy.write(buffer.getvalue())
+    return max(num_rows, 0)
 
 
 def update_nc_agencies(nc_csv_path, destination):
@@ -216,9 +251,9 @@ def update_nc_agencies(nc_csv_path, destination):
     until a developer adds the agency to the table in the source code.
     """
 
-    with open(os.path.join(destination, "Stop.csv")) as stop_file:
-        stops = csv.reader(stop_file)
-        next(stops)  # skip CSV header line
+    with open(os.path.join(destination, "Stop.txt")) as stop_file:
+        stops = standard_rows(stop_file)
+        next(stops, None)  # skip headings
         current_agencies = set()
         for row in stops:
             current_agencies.add(row[1])
@@ -259,9 +294,7 @@ def update_nc_agencies(nc_csv_path, destination):
            %s\n
         A new agency table is attached.  You can add census codes for the
         the new agencies before checking in.
-    """ % ", ".join(
-        extra_agencies
-    )
+    """ % ", ".join(extra_agencies)
     email = EmailMessage(
         "New NC agencies were discovered during import",
         email_body,
@@ -280,10 +313,77 @@ def set_time_zone(cur, time_zone):
     cur.execute(connections["traffic_stops_nc"].ops.set_time_zone_sql(), [time_zone])
 
 
-@transaction.atomic(using="traffic_stops_nc")
-def copy_from(destination, nc_csv_path):
-    """Populates the NC database from csv files."""
+def nc_connection():
+    """Open a new connection to the NC database, independent of Django's own"""
+    connection = connections["traffic_stops_nc"]
+    return connection.Database.connect(**connection.get_connection_params())
+
+
+def copy_to_staging(data_path, copy_sql):
+    """COPY one NC data file into its staging table on a dedicated connection."""
+    with nc_connection() as conn:
+        with conn.cursor() as cur:
+            set_time_zone(cur, settings.NC_TIME_ZONE)
+            cur.execute(f'SET search_path TO "{copy_nc.STAGING_SCHEMA}"')
+            return copy_data_file(cur, data_path, copy_sql)
+
 
+def load_staging_tables(destination, workers=None):
+    """
+    COPY the NC data files concurrently, each on its own connection, into
+    staging tables.  Each load commits independently; copy_from publishes the
+    staging tables together once every load has succeeded.
+
+    :param destination: directory path which contains NC data files
+    :param workers: number of concurrent connections; defaults to
+      settings.NC_IMPORT_WORKERS
+    """
+    workers = workers or settings.NC_IMPORT_WORKERS
+    logger.info(f"Creating staging tables in schema {copy_nc.STAGING_SCHEMA}")
+    with nc_connection() as conn:
+        conn.execute(copy_nc.CREATE_STAGING_SCHEMA)
+        for table in copy_nc.NC_COPY_TABLES.values():
+            conn.execute(copy_nc.CREATE_STAGING_TABLE.format(table=table))
+
+    path = Path(destination)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        # NC_COPY_INSTRUCTIONS lists the largest files first, so they start first
+        for name, copy_sql in copy_nc.NC_COPY_INSTRUCTIONS.items():
+            data_path = path / name
+            if not data_path.exists():
+                logger.warning(f"{data_path} not found, skipping")
+                continue
+            logger.info(f"COPY {name} into staging table")
+            futures[executor.submit(copy_to_staging, data_path, copy_sql)] = name
+        try:
+            for future in as_completed(futures):
+                logger.info(f"Copied {future.result():,} rows from {futures[future]}")
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+
+
+def copy_from(destination, nc_csv_path, parallel=False):
+    """
+    Populates the NC database from the NC tab-delimited data files.
+
+    :param parallel: load the data files concurrently into staging tables
+      (see load_staging_tables) and publish them in the import transaction
+    """
+    try:
+        if parallel:
+            load_staging_tables(destination)
+        _copy_from(destination, nc_csv_path, parallel)
+    finally:
+        if parallel:
+            with connections["traffic_stops_nc"].cursor() as cur:
+                cur.execute(copy_nc.DROP_STAGING_SCHEMA)
+
+
+@transaction.atomic(using="traffic_stops_nc")
+def _copy_from(destination, nc_csv_path, from_staging):
     with connections["traffic_stops_nc"].cursor() as cur:
         logger.info("Dropping NC constraints before import")
         drop_constraints_and_indexes(cur)
@@ -298,14 +398,20 @@ def copy_from(destination, nc_csv_path):
                 while data := fh.read(8192):
                     copy.write(data)
         # datasets
-        path = Path(destination)
-        for p in path.glob("*.csv"):
-            if p.name in copy_nc.NC_COPY_INSTRUCTIONS.keys():
-                with p.open() as fh:
-                    logger.info(f"COPY {p.name} into the database")
-                    with cur.copy(copy_nc.NC_COPY_INSTRUCTIONS[p.name]) as copy:
-                        while data := fh.read(8192):
-                            copy.write(data)
+        if from_staging:
+            for table in copy_nc.NC_COPY_TABLES.values():
+                logger.info(f"Publishing staged {table}")
+                cur.execute(copy_nc.PUBLISH_STAGING_TABLE.format(table=table))
+        else:
+            path = Path(destination)
+            for name, copy_sql in copy_nc.NC_COPY_INSTRUCTIONS.items():
+                data_path = path / name
+                if not data_path.exists():
+                    logger.warning(f"{data_path} not found, skipping")
+                    continue
+                logger.info(f"COPY {name} into the database")
+                num_rows = copy_data_file(cur, data_path, copy_sql)
+                logger.info(f"Copied {num_rows:,} rows from {name}")
         logger.info("Finalizing import (this will take a LONG time...)")
         cur.execute(copy_nc.FINALIZE_COPY)
         logger.info("ANALYZE")
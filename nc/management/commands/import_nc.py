@@ -12,6 +12,12 @@ class Command(BaseCommand):
         parser.add_argument("--min-stop-id", default=None)
         parser.add_argument("--max-stop-id", default=None)
         parser.add_argument("--noprime", "-n", action="store_true", dest="no_prime", default=False)
+        parser.add_argument(
+            "--parallel",
+            action="store_true",
+            default=False,
+            help="COPY data files concurrently into staging tables",
+        )
 
     def handle(self, *args, **options):
         min_stop_id = int(options["min_stop_id"]) if options["min_stop_id"] else None
@@ -22,4 +28,5 @@ class Command(BaseCommand):
             min_stop_id=min_stop_id,
             max_stop_id=max_stop_id,
             prime_cache=not options["no_prime"],
+            parallel=options["parallel"],
         )
@@ -0,0 +1,118 @@
+import csv
+import os
+import tempfile
+
+from django.db import connections
+from django.test import TestCase
+
+from nc.data import copy_nc
+from nc.data.importer import (
+    copy_data_file,
+    load_staging_tables,
+    standard_rows,
+    to_standard_csv,
+)
+
+STOP_LINES = [
+    "1\tAgency 1  \t2020-01-01 10:00:00.000\t1\t2\t0\t0\t0\t0\t0\t0\t0\t100\tWake\tRaleigh\r\n",
+    "2\tAgency\x00 2\t2020-02-01 10:00:00.000\t3\t1\t1\t0\t0\t0\t0\t0\t0\t200\tDurham\tDurham\textra\r\n",
+    '3\t"Agency, 3"\t2020-03-01 10:00:00.000\t5\t3\t0\t0\t0\t1\t0\t0\t0\t300\tWake\tCary\r\n',
+]
+
+PERSON_LINES = [
+    "10\t1\tD\t30\tM\tN\tW\r\n",
+    "11\t2\tD\t45\tF\tH\tW\r\n",
+    "12\t2\tP\t12\tF\tH\tW\r\n",
+    "13\t3\tD\t22\tM\tN\tB\r\n",
+]
+
+
+def write_data_files(destination):
+    with open(os.path.join(destination, "Stop.txt"), "w") as datafile:
+        datafile.writelines(STOP_LINES)
+    with open(os.path.join(destination, "PERSON.txt"), "w") as datafile:
+        datafile.writelines(PERSON_LINES)
+
+
+class StandardRowsTests(TestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        self.destination_td = tempfile.TemporaryDirectory()
+        self.destination = self.destination_td.name
+        self.stop_path = os.path.join(self.destination, "Stop.txt")
+        write_data_files(self.destination)
+
+    def tearDown(self):
+        self.destination_td.cleanup()
+
+    def test_standard_rows(self):
+        """NUL bytes and whitespace are removed and extra columns are dropped"""
+        with open(self.stop_path) as datafile:
+            rows = list(standard_rows(datafile))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0], ["column%d" % i for i in range(1, 16)])
+        self.assertEqual(rows[1][1], "Agency 1")
+        self.assertEqual(rows[2][1], "Agency 2")
+        self.assertEqual(rows[3][1], "Agency, 3")
+        self.assertTrue(all(len(row) == 15 for row in rows))
+
+    def test_to_standard_csv(self):
+        csv_path = os.path.join(self.destination, "Stop.csv")
+        to_standard_csv(self.stop_path, csv_path)
+        with open(csv_path) as csvfile:
+            rows = list(csv.reader(csvfile))
+        self.assertEqual(rows[0][0], "column1")
+        self.assertEqual([row[1] for row in rows[1:]], ["Agency 1", "Agency 2", "Agency, 3"])
+
+    def test_copy_data_file(self):
+        """Rows are streamed straight from the tab-delimited file into COPY"""
+        with connections["traffic_stops_nc"].cursor() as cur:
+            other_columns = ", ".join(f"column{i} text" for i in range(3, 16))
+            cur.execute(
+                f"CREATE TEMPORARY TABLE stop_copy (stop_id integer, agency text, {other_columns})"
+            )
+            num_rows = copy_data_file(
+                cur, self.stop_path, "COPY stop_copy FROM STDIN WITH CSV HEADER"
+            )
+            cur.execute("SELECT stop_id, agency FROM stop_copy ORDER BY stop_id")
+            rows = cur.fetchall()
+        self.assertEqual(num_rows, 3)
+        self.assertEqual(rows, [(1, "Agency 1"), (2, "Agency 2"), (3, "Agency, 3")])
+
+
+class StagingTests(TestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        self.destination_td = tempfile.TemporaryDirectory()
+        self.destination = self.destination_td.name
+        write_data_files(self.destination)
+
+    def tearDown(self):
+        self.destination_td.cleanup()
+        with connections["traffic_stops_nc"].cursor() as cur:
+            cur.execute(copy_nc.DROP_STAGING_SCHEMA)
+
+    def test_load_staging_tables(self):
+        """Each data file is loaded into its own staging table"""
+        load_staging_tables(self.destination, workers=2)
+        with connections["traffic_stops_nc"].cursor() as cur:
+            counts = {}
+            for table in copy_nc.NC_COPY_TABLES.values():
+                cur.execute(f'SELECT COUNT(*) FROM "{copy_nc.STAGING_SCHEMA}"."{table}"')
+                counts[table] = cur.fetchone()[0]
+            cur.execute(
+                f'SELECT stop_id, agency_description FROM "{copy_nc.STAGING_SCHEMA}"."nc_stop"'
+                " ORDER BY stop_id"
+            )
+            stops = cur.fetchall()
+        self.assertEqual(
+            counts,
+            {"nc_stop": 3, "nc_person": 4, "nc_search": 0, "nc_contraband": 0, "nc_searchbasis": 0},
+        )
+        self.assertEqual(stops, [(1, "Agency 1"), (2, "Agency 2"), (3, "Agency, 3")])
+        # the public tables are untouched until the staging tables are published
+        with connections["traffic_stops_nc"].cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM nc_stop WHERE stop_id IN (1, 2, 3)")
+            self.assertEqual(cur.fetchone()[0], 0)
@@ -23,19 +23,17 @@ class StableAgencyTests(TestCase):
             "Agency 5",
         ]
         self.perm_agency_table = os.path.join(self.destination, "Perm_NC_agencies.csv")
-        self.stops_csv_file = os.path.join(self.destination, "Stop.csv")
-        self.create_dummy_stops(self.stops_csv_file, self.agencies_in_stops)
+        self.stops_data_file = os.path.join(self.destination, "Stop.txt")
+        self.create_dummy_stops(self.stops_data_file, self.agencies_in_stops)
 
     def tearDown(self):
         self.destination_td.cleanup()
 
     @staticmethod
-    def create_dummy_stops(stops_csv_file, agencies_in_stops):
-        with open(stops_csv_file, "w") as csvfile:
-            stops_writer = csv.writer(csvfile)
-            stops_writer.writerow(["column1", "column2", "column3"])
+    def create_dummy_stops(stops_data_file, agencies_in_stops):
+        with open(stops_data_file, "w") as datafile:
             for agency_id, agency_name in enumerate(agencies_in_stops):
-                stops_writer.writerow([str(agency_id + 1), agency_name, "foo"])
+                datafile.write(f"{agency_id + 1}\t{agency_name}\tfoo\r\n")
 
     @staticmethod
     def create_dummy_agency_table(agency_file, agencies_in_table):
@@ -47,7 +45,7 @@ class StableAgencyTests(TestCase):
 
     def test_new_agency(self):
         """
-        Two new agencies in Stops.csv; verify that a temporary
+        Two new agencies in Stop.txt; verify that a temporary
         agency table with those two added will be used for import.
         """
         agencies_in_table = [
@@ -81,7 +79,7 @@ class StableAgencyTests(TestCase):
 
     def test_same_agencies(self):
         """
-        Stops.csv has same set of agencies as table; verify that the normal
+        Stop.txt has same set of agencies as table; verify that the normal
         table is used for import.
         """
         agencies_in_table = self.agencies_in_stops
@@ -338,6 +338,9 @@ CENSUS_API_KEY = os.getenv("CENSUS_API_KEY", "")
 
 NC_AUTO_IMPORT_DIRECTORY = "/tmp/nc-automated-import"
 
+# Number of concurrent database connections used by parallel NC import phases
+NC_IMPORT_WORKERS = int(os.getenv("NC_IMPORT_WORKERS", 5))
+
 # 0, 1, or 2 e-mail addresses which will be notified after
 # automatic NC imports
 NC_AUTO_IMPORT_MONITORS = ("forwardjustice-team@caktusgroup.com",)